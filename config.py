@@ -6,20 +6,35 @@ Single source of truth for credentials, paths, and filter defaults.
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-
 # ====================================================================
 # PATHS
 # ====================================================================
 PROJECT_DIR = Path(__file__).resolve().parent
 DATA_DIR = PROJECT_DIR / "data"
+STATIC_DIR = PROJECT_DIR / "static"
 VENV_PYTHON = PROJECT_DIR / "venv" / "bin" / "python3"
-CHINA_CACHE_FILE = PROJECT_DIR / ".china_filter_cache.json"
+CHINA_CACHE_FILE = PROJECT_DIR / ".china_filter_cache.jsonl"
+SEC_TICKER_CACHE_FILE = PROJECT_DIR / ".sec_ticker_cache.json"
+CHINA_ALLOWLIST_FILE = PROJECT_DIR / "us_domicile.txt"   # optional, one known-US ticker per line
 
 # ====================================================================
 # CREDENTIALS
 # ====================================================================
-load_dotenv(PROJECT_DIR / ".env")
+_ENV_LOADED = globals().get("_ENV_LOADED", False)   # survives importlib.reload
+
+
+def _load_env_once():
+    """Parse .env into os.environ, at most once per process."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        from dotenv import load_dotenv
+        load_dotenv(PROJECT_DIR / ".env")
+        _ENV_LOADED = True
+
+
+# Skip the parse entirely when credentials are already exported (deployments)
+if not (os.getenv("APCA_API_KEY_ID") and os.getenv("APCA_API_SECRET_KEY")):
+    _load_env_once()
 APCA_API_KEY_ID = os.getenv("APCA_API_KEY_ID")
 APCA_API_SECRET_KEY = os.getenv("APCA_API_SECRET_KEY")
 
@@ -31,11 +46,23 @@ SCREENER_MIN_CHANGE = 20.0       # Min % change to include
 SCREENER_MAX_PRICE = 22.0        # Max price filter ($)
 SCREENER_MIN_PRICE = 1.0         # Min price filter ($)
 NEWS_LOOKBACK_HOURS = 48         # How far back to check for news catalysts
+NEWS_WORKERS = 4                 # Concurrent news requests when symbols span several chunks
+WARRANT_SUFFIXES = ("W", "WS", "WT", "PR", "U", "R")   # Warrant / unit / rights / preferred tickers
+
+# ====================================================================
+# HISTORICAL BARS (fetch.py)
+# ====================================================================
+FETCH_WORKERS = 4                # Concurrent bar requests
+FETCH_MIN_INTERVAL = 0.3         # Min seconds between request starts (API rate limit)
 
 # ====================================================================
 # SEC EDGAR (China stock filter)
 # ====================================================================
 SEC_USER_AGENT = "StockScreener admin@localhost"
+SEC_WORKERS = 8                  # Concurrent EDGAR lookups
+SEC_MAX_RPS = 10                 # SEC fair-access limit (requests/sec)
+SEC_TICKER_MAP_TTL = 24 * 3600   # Seconds before the cached ticker map is revalidated
+CHINA_CACHE_TTL = 30 * 24 * 3600 # Re-check a cached domicile after this many seconds
 # Country codes: F4=China, G6=Hong Kong, E9=Cayman Islands, K6=British Virgin Islands
 CHINA_COUNTRY_CODES = {"F4", "G6", "E9", "K6"}
 
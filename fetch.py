@@ -5,17 +5,52 @@ Uses config for credentials and paths.
 
 Usage:
     python3 fetch.py CATX FEED KRRO        # Fetch specific symbols
-    python3 fetch.py                        # Re-fetch all existing data/*.csv symbols
+    python3 fetch.py                        # Re-fetch all existing data/ symbols
 """
 
+import os
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
 import pandas as pd
-import pytz
 
 import config as cfg
+from throttle import Throttle
+
+ET = ZoneInfo("America/New_York")
+FETCH_CHUNK = 200   # symbols per StockBarsRequest
+BARS_SUFFIX = "_1Min.parquet"
+LEGACY_BARS_SUFFIX = "_1Min.csv"
+
+
+def _last_bar(path):
+    """Timestamp of the newest stored bar, or None if the file can't be read."""
+    try:
+        ts = pd.read_parquet(path, engine="pyarrow", columns=["timestamp_et"])["timestamp_et"]
+    except Exception:
+        return None
+    return ts.max() if len(ts) else None
+
+
+def _merge_bars(old: pd.DataFrame, new: pd.DataFrame, window_start) -> pd.DataFrame:
+    """Stored bars plus freshly fetched ones, deduped, in time order and trimmed to the window."""
+    df = pd.concat([old, new], ignore_index=True)
+    df = df.drop_duplicates(subset="timestamp_et", keep="last").sort_values("timestamp_et")
+    return df[df["timestamp_et"] >= window_start].reset_index(drop=True)
+
+
+def _stored_symbols() -> set:
+    """Symbols with bars in DATA_DIR. Legacy .csv ones get re-fetched as Parquet."""
+    try:
+        with os.scandir(cfg.DATA_DIR) as it:
+            return {e.name[:-len(suffix)]
+                    for e in it
+                    for suffix in (BARS_SUFFIX, LEGACY_BARS_SUFFIX)
+                    if e.name.endswith(suffix) and e.is_file()}
+    except FileNotFoundError:
+        return set()
 
 
 def fetch_data(symbols: list, days: int = 35):
@@ -28,8 +63,7 @@ def fetch_data(symbols: list, days: int = 35):
     cfg.DATA_DIR.mkdir(exist_ok=True)
     client = StockHistoricalDataClient(cfg.APCA_API_KEY_ID, cfg.APCA_API_SECRET_KEY)
 
-    et = pytz.timezone("America/New_York")
-    end = datetime.now(et)
+    end = datetime.now(ET)
     start = end - timedelta(days=days)
 
     print(f"\n  Fetching 1-min bars: {start.date()} to {end.date()}")
@@ -38,54 +72,101 @@ def fetch_data(symbols: list, days: int = 35):
     success = 0
     skipped = 0
 
+    # Request start -> [(position in symbols, symbol)]. Cached symbols only
+    # ask for bars from midnight ET of their last stored bar's day, so symbols
+    # last updated the same day batch together however sparse their trading;
+    # the re-fetched overlap is deduped by _merge_bars.
+    pending = {}
     for i, sym in enumerate(symbols, 1):
-        outfile = cfg.DATA_DIR / f"{sym}_1Min.csv"
+        outfile = cfg.DATA_DIR / f"{sym}{BARS_SUFFIX}"
+        sym_start = start
         if outfile.exists():
-            mtime = datetime.fromtimestamp(outfile.stat().st_mtime, tz=et)
+            mtime = datetime.fromtimestamp(outfile.stat().st_mtime, tz=ET)
             if mtime.date() == end.date():
                 print(f"  [{i:>2}/{len(symbols)}] {sym:>6} ... CACHED (today)")
                 success += 1
                 continue
+            last = _last_bar(outfile)
+            if last is not None:
+                sym_start = max(start, last.tz_convert(ET).normalize().to_pydatetime())
+        pending.setdefault(sym_start, []).append((i, sym))
+
+    throttle = Throttle(cfg.FETCH_MIN_INTERVAL)
 
-        print(f"  [{i:>2}/{len(symbols)}] {sym:>6} ... ", end="", flush=True)
+    def request(job):
+        """Worker thread: network only. Returns (df, None) or (None, error)."""
+        chunk_start, chunk = job
+        throttle.wait()
         try:
             req = StockBarsRequest(
-                symbol_or_symbols=sym,
+                symbol_or_symbols=[sym for _, sym in chunk],
                 timeframe=TimeFrame.Minute,
-                start=start,
+                start=chunk_start,
                 end=end,
                 feed=DataFeed.SIP,
             )
-            bars = client.get_stock_bars(req)
-            df = bars.df
-
-            if df.empty:
-                print("NO DATA")
-                skipped += 1
+            return client.get_stock_bars(req).df, None
+        except Exception as e:
+            return None, e
+
+    # One request per chunk of symbols (the client follows pagination itself),
+    # run concurrently. Results come back in order and are written here, so
+    # files and output stay on the main thread.
+    jobs = [(chunk_start, group[c:c + FETCH_CHUNK])
+            for chunk_start, group in pending.items()
+            for c in range(0, len(group), FETCH_CHUNK)]
+    with ThreadPoolExecutor(max_workers=cfg.FETCH_WORKERS) as pool:
+        results = pool.map(request, jobs)
+        for (chunk_start, chunk), (df, err) in zip(jobs, results):
+            print(f"  Requested {len(chunk)} symbols ... ", end="", flush=True)
+            if err is not None:
+                print(f"ERROR: {err}")
+                skipped += len(chunk)
                 continue
+            print("ok")
 
-            if isinstance(df.index, pd.MultiIndex):
+            by_symbol = {}
+            if not df.empty:
+                # One copy out of the MultiIndex; rename, pop and tz_convert work
+                # in place on it, so each group is sliced out already clean.
                 df = df.reset_index()
-                df = df.drop(columns=["symbol"], errors="ignore")
-                df = df.rename(columns={"timestamp": "timestamp_et"})
-            else:
-                df = df.reset_index()
-                df = df.rename(columns={"timestamp": "timestamp_et"})
-
-            df["timestamp_et"] = df["timestamp_et"].dt.tz_convert(et)
-            df.to_csv(outfile, index=False)
-
-            bars_count = len(df)
-            days_count = df["timestamp_et"].dt.date.nunique()
-            print(f"{bars_count:>7,} bars | {days_count} days")
-            success += 1
-
-        except Exception as e:
-            print(f"ERROR: {e}")
-            skipped += 1
-
-        if i < len(symbols):
-            time.sleep(0.3)
+                df.rename(columns={"timestamp": "timestamp_et"}, inplace=True)
+                df["timestamp_et"] = df["timestamp_et"].dt.tz_convert(ET)
+                by_symbol = dict(iter(df.groupby(df.pop("symbol"), sort=False)))
+
+            incremental = chunk_start > start
+            for i, sym in chunk:
+                print(f"  [{i:>2}/{len(symbols)}] {sym:>6} ... ", end="", flush=True)
+                sym_df = by_symbol.get(sym)
+                if sym_df is None:
+                    if incremental:
+                        print("UP TO DATE")
+                        success += 1
+                    else:
+                        print("NO DATA")
+                        skipped += 1
+                    continue
+                try:
+                    outfile = cfg.DATA_DIR / f"{sym}{BARS_SUFFIX}"
+                    new_count = len(sym_df)
+                    if incremental:
+                        old = pd.read_parquet(outfile, engine="pyarrow")
+                        new_count = int((~sym_df["timestamp_et"].isin(old["timestamp_et"])).sum())
+                        if not new_count:
+                            print("UP TO DATE")
+                            success += 1
+                            continue
+                        sym_df = _merge_bars(old, sym_df, start)
+                    sym_df.to_parquet(outfile, engine="pyarrow", compression="snappy", index=False)
+
+                    bars_count = len(sym_df)
+                    days_count = sym_df["timestamp_et"].dt.date.nunique()
+                    added = f" (+{new_count:,} new)" if incremental else ""
+                    print(f"{bars_count:>7,} bars | {days_count} days{added}")
+                    success += 1
+                except Exception as e:
+                    print(f"ERROR: {e}")
+                    skipped += 1
 
     print(f"  Done: {success} fetched, {skipped} skipped\n")
     return success
@@ -99,9 +180,9 @@ def main():
     if len(sys.argv) > 1:
         symbols = [s.upper() for s in sys.argv[1:]]
     else:
-        existing = sorted(cfg.DATA_DIR.glob("*_1Min.csv"))
+        existing = _stored_symbols()
         if existing:
-            symbols = [p.stem.replace("_1Min", "") for p in existing]
+            symbols = sorted(existing)
             print(f"  Re-fetching {len(symbols)} existing symbols from data/")
         else:
             print("  No symbols specified and no existing data. Pass symbols as arguments.")
@@ -3,60 +3,235 @@ filters.py — Warrant, China, and News Filters
 All filtering logic in one module. Imports config for credentials and paths.
 """
 
-import json
+import functools
+import os
 import re
+import sys
+import threading
 import time
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
+import orjson
 import pytz
+import requests
+from requests.adapters import HTTPAdapter
 
 import config as cfg
+from throttle import Throttle
+
+try:
+    import hyperscan
+except ImportError:   # optional; falls back to the re pattern
+    hyperscan = None
+try:
+    import simdjson
+except ImportError:   # optional; submissions are parsed in full instead
+    simdjson = None
 
 
 # ============================================================================
 # Warrant / unit / rights filter
 # ============================================================================
-WARRANT_RE = re.compile(r'[.\-]?(WS?|WT|PR|U|R)$', re.IGNORECASE)
+# A "." or "-" separator before the suffix doesn't change the match, so a
+# plain suffix test against cfg.WARRANT_SUFFIXES covers WS, .WS and -WS alike.
+def is_warrant(sym: str) -> bool:
+    """True for warrant / unit / rights / preferred tickers."""
+    return sym.upper().endswith(cfg.WARRANT_SUFFIXES)
+
+
+# ============================================================================
+# Progress reporting
+# ============================================================================
+def _report_progress(progress_cb, i: int, total: int):
+    """Call progress_cb(i, total) at most ~20 times per pass, always on the last item."""
+    if progress_cb and (i % max(1, total // 20) == 0 or i == total):
+        progress_cb(i, total)
+
+
+def _write_lines(lines: list):
+    """Write per-symbol report lines to stdout in one call instead of one print each."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 
 # ============================================================================
 # China stock filter (SEC EDGAR)
 # ============================================================================
-def _load_china_cache() -> dict:
-    if cfg.CHINA_CACHE_FILE.exists():
+# One keep-alive pool shared by the lookup threads, so each sec.gov host costs
+# a TLS handshake per connection rather than per request
+# Submissions JSON compresses ~4:1. requests already sends Accept-Encoding
+# (gzip/deflate, plus br when brotli is installed) and decodes the response.
+_SEC_SESSION = requests.Session()
+_SEC_SESSION.headers.update({"User-Agent": cfg.SEC_USER_AGENT})
+_SEC_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=cfg.SEC_WORKERS))
+
+
+def _sec_get(url: str, headers: dict = None) -> requests.Response:
+    resp = _SEC_SESSION.get(url, headers=headers, timeout=15)
+    if resp.status_code != 304:
+        resp.raise_for_status()
+    return resp
+
+
+def _load_json_file(path) -> dict:
+    if path.exists():
         try:
-            return json.loads(cfg.CHINA_CACHE_FILE.read_text())
+            return orjson.loads(path.read_bytes())
         except Exception:
             return {}
     return {}
 
 
-def _save_china_cache(cache: dict):
-    cfg.CHINA_CACHE_FILE.write_text(json.dumps(cache, indent=2))
+# The China cache is append-only JSONL, one {"symbol": ..., **entry} line per
+# lookup; later lines win. Loading compacts it once stale lines pile up.
+# "symbol" is always written first, so a line's key can be read without
+# parsing the rest of it.
+_CACHE_SYMBOL_RE = re.compile(rb'\{"symbol":\s*"([^"]*)"')
+
+
+def _china_cache_line(sym: str, entry: dict) -> bytes:
+    return orjson.dumps({"symbol": sym, **entry}) + b"\n"
+
+
+def _write_china_cache(cache: dict):
+    tmp = cfg.CHINA_CACHE_FILE.with_suffix(".tmp")
+    tmp.write_bytes(b"".join(_china_cache_line(sym, e) for sym, e in cache.items()))
+    tmp.replace(cfg.CHINA_CACHE_FILE)
+
+
+def _open_china_cache_for_append():
+    """Open the cache for appending. A crash mid-append can leave the last line
+    unterminated; end it first so the next entry starts on a line of its own."""
+    f = open(cfg.CHINA_CACHE_FILE, "ab+")
+    if f.tell():
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    return f
+
+
+def _load_china_cache(symbols=None) -> dict:
+    """
+    Load the China cache. With symbols given, only lines for those symbols are
+    JSON-decoded; the rest are skipped by key, so a large cache costs little to
+    consult for a 20-symbol scan.
+    """
+    wanted = None if symbols is None else {s.encode() for s in symbols}
+    if not cfg.CHINA_CACHE_FILE.exists():
+        # One-time migration from the old single-document .json cache
+        legacy = _load_json_file(cfg.CHINA_CACHE_FILE.with_suffix(".json"))
+        if legacy:
+            _write_china_cache(legacy)
+        if wanted is None:
+            return legacy
+        return {s: e for s, e in legacy.items() if s.encode() in wanted}
+
+    cache = {}
+    keys = set()
+    lines = 0
+    with open(cfg.CHINA_CACHE_FILE, "rb") as f:
+        for line in f:
+            m = _CACHE_SYMBOL_RE.match(line)
+            if not m:
+                continue   # e.g. a line cut short by a crash mid-append
+            key = m.group(1)
+            keys.add(key)
+            lines += 1
+            if wanted is not None and key not in wanted:
+                continue
+            try:
+                entry = orjson.loads(line)
+            except Exception:
+                continue
+            cache[entry.pop("symbol")] = entry
+    if lines > 2 * len(keys) + 50:
+        if wanted is None:
+            _write_china_cache(cache)
+        else:
+            _load_china_cache()   # a full pass rewrites the file compacted
+    return cache
+
+
+def _intern_keys(ticker_map: dict) -> dict:
+    # Ticker symbols repeat across the map, the China cache and every scan;
+    # interning shares one copy of each and lets dict lookups hit on identity.
+    return {sys.intern(t): cik for t, cik in ticker_map.items()}
 
 
 def _get_sec_ticker_map() -> dict:
-    """Download SEC ticker -> CIK mapping (cached in memory per run)."""
-    url = "https://www.sec.gov/files/company_tickers.json"
-    req = urllib.request.Request(url, headers={"User-Agent": cfg.SEC_USER_AGENT})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        data = json.loads(resp.read())
-    return {entry["ticker"].upper(): entry["cik_str"] for entry in data.values()}
+    """
+    SEC ticker -> CIK mapping, memoized in memory for the current
+    SEC_TICKER_MAP_TTL window so repeat scans in one process (the dashboard
+    rescans every few minutes) don't even re-read the disk cache.
+    """
+    return _load_sec_ticker_map(int(time.time() // max(1, cfg.SEC_TICKER_MAP_TTL)))
+
+
+@functools.lru_cache(maxsize=1)
+def _load_sec_ticker_map(_window: int) -> dict:
+    """
+    SEC ticker -> CIK mapping, cached on disk. Within SEC_TICKER_MAP_TTL the
+    cached copy is used as is; after that a conditional GET revalidates it, so
+    the ~1 MB file is only downloaded again when SEC has published a new one.
+    A failed fetch raises and so is not memoized.
+    """
+    cached = _load_json_file(cfg.SEC_TICKER_CACHE_FILE)
+    if cached.get("map") and time.time() - cached.get("fetched_at", 0) < cfg.SEC_TICKER_MAP_TTL:
+        return _intern_keys(cached["map"])
+
+    headers = {}
+    if cached.get("map"):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    resp = _sec_get("https://www.sec.gov/files/company_tickers.json", headers)
+
+    if resp.status_code == 304:
+        cached["fetched_at"] = time.time()
+    else:
+        data = orjson.loads(resp.content)
+        cached = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "map": {entry["ticker"].upper(): entry["cik_str"] for entry in data.values()},
+        }
+    try:
+        cfg.SEC_TICKER_CACHE_FILE.write_bytes(orjson.dumps(cached))
+    except OSError:
+        pass   # still usable for this run
+    return _intern_keys(cached["map"])
+
+
+# A submissions document is mostly filing history we never read. simdjson only
+# materializes the fields actually accessed; a Parser isn't thread-safe and
+# its document dies on the next parse, so each lookup thread keeps its own.
+_sec_parsers = threading.local()
+
+
+def _submission_fields(content: bytes) -> tuple:
+    """(business country, incorporation, name) from an EDGAR submissions document."""
+    if simdjson:
+        parser = getattr(_sec_parsers, "parser", None)
+        if parser is None:
+            parser = _sec_parsers.parser = simdjson.Parser()
+        data = parser.parse(content)
+    else:
+        data = orjson.loads(content)
+
+    biz = (data.get("addresses") or {}).get("business") or {}
+    return (biz.get("stateOrCountry") or "",
+            data.get("stateOfIncorporation") or "",
+            data.get("name") or "")
 
 
 def _check_china_stock(cik: int) -> tuple:
     """Query SEC EDGAR for a company's domicile. Returns (is_china, country_code, inc_code, name)."""
-    cik_padded = str(cik).zfill(10)
-    url = f"https://data.sec.gov/submissions/CIK{cik_padded}.json"
-    req = urllib.request.Request(url, headers={"User-Agent": cfg.SEC_USER_AGENT})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        data = json.loads(resp.read())
-
-    biz = data.get("addresses", {}).get("business", {})
-    country_code = biz.get("stateOrCountry", "") or ""
-    inc_code = data.get("stateOfIncorporation", "") or ""
-    name = data.get("name", "") or ""
+    content = _sec_get(f"https://data.sec.gov/submissions/CIK{cik:010d}.json").content
+    country_code, inc_code, name = _submission_fields(content)
 
     # Require both business address AND incorporation to be suspicious
     china_biz = country_code in cfg.CHINA_COUNTRY_CODES
@@ -65,11 +240,34 @@ def _check_china_stock(cik: int) -> tuple:
     return is_china, country_code, inc_code, name
 
 
-def filter_china_stocks(gainers: list) -> list:
-    """Remove Chinese-domiciled stocks using SEC EDGAR data. Results are cached."""
-    cache = _load_china_cache()
-
-    symbols_to_check = [g["symbol"] for g in gainers if g["symbol"] not in cache]
+def _load_china_allowlist() -> frozenset:
+    """
+    Tickers known to be US-domiciled, from the optional, hand-maintained
+    CHINA_ALLOWLIST_FILE (one per line, # comments allowed). These are always
+    kept and skip the EDGAR lookup. It is re-read on every scan and never
+    expires; it stays in force until the user edits it.
+    """
+    try:
+        text = cfg.CHINA_ALLOWLIST_FILE.read_text()
+    except OSError:
+        return frozenset()
+    symbols = (line.split("#", 1)[0].strip().upper() for line in text.splitlines())
+    return frozenset(s for s in symbols if s)
+
+
+def filter_china_stocks(gainers: list, progress_cb=None) -> list:
+    """Remove Chinese-domiciled stocks using SEC EDGAR data. Results are cached
+    for CHINA_CACHE_TTL, so a redomiciled company is picked up eventually.
+    progress_cb(i, total), if given, is called as uncached symbols are looked up."""
+    cache = _load_china_cache(g["symbol"] for g in gainers)
+    allowlist = _load_china_allowlist()
+
+    now = time.time()
+    symbols_to_check = [
+        sym for sym in (g["symbol"] for g in gainers)
+        if sym not in allowlist
+        and now - cache.get(sym, {}).get("fetched_at", 0) >= cfg.CHINA_CACHE_TTL
+    ]
 
     if symbols_to_check:
         print("  Checking SEC EDGAR for Chinese stocks...")
@@ -80,34 +278,59 @@ def filter_china_stocks(gainers: list) -> list:
             print("  Skipping China filter.")
             return gainers
 
-        for sym in symbols_to_check:
+        throttle = Throttle(1 / cfg.SEC_MAX_RPS)
+
+        def lookup(sym):
+            """Worker thread: one EDGAR request. Returns (result, None) or (None, error)."""
             cik = ticker_map.get(sym)
             if cik is None:
-                cache[sym] = {"is_china": False, "country": "??", "inc": "??",
-                              "name": sym, "note": "Not in SEC"}
-                print(f"    {sym:>6} -> not found in SEC (keeping)")
-                continue
+                return None, None
+            throttle.wait()
             try:
-                is_china, country, inc, name = _check_china_stock(cik)
-                cache[sym] = {"is_china": is_china, "country": country,
-                              "inc": inc, "name": name}
-                if is_china:
-                    print(f"    {sym:>6} -> CHINA/SHELL ({country}/{inc}) — {name}")
-                else:
-                    print(f"    {sym:>6} -> OK ({country}/{inc})")
+                return _check_china_stock(cik), None
             except Exception as e:
-                cache[sym] = {"is_china": False, "country": "??", "inc": "??",
-                              "name": sym, "note": f"Lookup failed: {e}"}
-                print(f"    {sym:>6} -> lookup failed ({e}), keeping")
-            time.sleep(0.15)  # SEC rate limit ~10/sec
-
-        _save_china_cache(cache)
+                return None, e
+
+        # Lookups run concurrently; results come back in order and the cache
+        # and output are only touched here. Each result is appended to the
+        # cache file as it lands.
+        total = len(symbols_to_check)
+        lines = []
+        with ThreadPoolExecutor(max_workers=cfg.SEC_WORKERS) as pool, \
+                _open_china_cache_for_append() as cache_file:
+            results = pool.map(lookup, symbols_to_check)
+            for i, (sym, (result, err)) in enumerate(zip(symbols_to_check, results), 1):
+                _report_progress(progress_cb, i, total)
+                if err is not None and sym in cache:
+                    # Keep the expired entry rather than forget a known answer
+                    lines.append(f"    {sym:>6} -> lookup failed ({err}), using cached result")
+                    continue
+                if err is not None:
+                    entry = {"is_china": False, "country": "??", "inc": "??",
+                             "name": sym, "note": f"Lookup failed: {err}"}
+                    lines.append(f"    {sym:>6} -> lookup failed ({err}), keeping")
+                elif result is None:
+                    entry = {"is_china": False, "country": "??", "inc": "??",
+                             "name": sym, "note": "Not in SEC"}
+                    lines.append(f"    {sym:>6} -> not found in SEC (keeping)")
+                else:
+                    is_china, country, inc, name = result
+                    entry = {"is_china": is_china, "country": country,
+                             "inc": inc, "name": name}
+                    if is_china:
+                        lines.append(f"    {sym:>6} -> CHINA/SHELL ({country}/{inc}) — {name}")
+                    else:
+                        lines.append(f"    {sym:>6} -> OK ({country}/{inc})")
+                entry["fetched_at"] = now
+                cache[sym] = entry
+                cache_file.write(_china_cache_line(sym, entry))
+        _write_lines(lines)
 
     filtered = []
     removed = []
     for g in gainers:
         entry = cache.get(g["symbol"], {})
-        if entry.get("is_china", False):
+        if entry.get("is_china", False) and g["symbol"] not in allowlist:
             removed.append(g["symbol"])
         else:
             filtered.append(g)
@@ -123,19 +346,96 @@ def filter_china_stocks(gainers: list) -> list:
 # ============================================================================
 # News catalyst checker (Alpaca News API)
 # ============================================================================
-_ROUNDUP_RE = re.compile(
-    r'stocks?\s+moving|pre-market session|after-market session|intraday session'
-    r'|most active|biggest movers|top gainers|top losers'
-    r'|mid-day gainers|mid-day losers|weekly gainer'
-    r'|unusual volume|penny stocks?|meme stocks?',
-    re.IGNORECASE,
+_ROUNDUP_PATTERNS = (
+    r'stocks?\s+moving', r'pre-market session', r'after-market session', r'intraday session',
+    r'most active', r'biggest movers', r'top gainers', r'top losers',
+    r'mid-day gainers', r'mid-day losers', r'weekly gainer',
+    r'unusual volume', r'penny stocks?', r'meme stocks?',
 )
+_ROUNDUP_RE = re.compile("|".join(_ROUNDUP_PATTERNS), re.IGNORECASE)
+
+# Hyperscan, when installed, scans all patterns in one DFA pass. Scratch space
+# isn't shareable between concurrent scans, so each thread gets its own.
+if hyperscan:
+    _ROUNDUP_DB = hyperscan.Database()
+    _ROUNDUP_DB.compile(expressions=[p.encode() for p in _ROUNDUP_PATTERNS],
+                        flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH)
+    _roundup_scratch = threading.local()
+
+
+def _halt_scan(*_):
+    return True   # first match decides it; stop scanning
+
+
+def _is_roundup(headline: str) -> bool:
+    """True for generic market-roundup headlines (not company-specific news)."""
+    if not hyperscan:
+        return _ROUNDUP_RE.search(headline) is not None
+    scratch = getattr(_roundup_scratch, "scratch", None)
+    if scratch is None:
+        scratch = _roundup_scratch.scratch = hyperscan.Scratch(_ROUNDUP_DB)
+    try:
+        _ROUNDUP_DB.scan(headline.encode("utf-8"), match_event_handler=_halt_scan, scratch=scratch)
+    except hyperscan.ScanTerminated:
+        return True
+    return False
+
+
+NEWS_CHUNK = 50   # symbols per NewsRequest, keeps the query string a sane length
+
+
+def _news_by_symbol(client, symbols: list, start: datetime, per_symbol: int,
+                    progress_cb=None) -> dict:
+    """
+    News since `start` for `symbols`, one paginated request per NEWS_CHUNK
+    symbols (run concurrently), bucketed by the symbols each article is tagged
+    with: {symbol: [article, ...]}, newest first, at most `per_symbol` each.
+    There's no overall limit, so one busy symbol can't push the others'
+    articles out of the window. progress_cb(done, total), if given, counts
+    symbols whose request has finished.
+    """
+    from alpaca.data.requests import NewsRequest
 
+    def request(chunk):
+        req = NewsRequest(symbols=",".join(chunk), start=start,
+                          include_content=False, exclude_contentless=False)
+        return client.get_news(request_params=req).data.get("news", [])
+
+    buckets = {sym: [] for sym in symbols}
+    chunks = [symbols[c:c + NEWS_CHUNK] for c in range(0, len(symbols), NEWS_CHUNK)]
+    total = len(symbols)
+    done = 0
+    if progress_cb:
+        progress_cb(0, total)
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), cfg.NEWS_WORKERS)) as pool:
+            futures = {pool.submit(request, chunk): len(chunk) for chunk in chunks}
+            for future in as_completed(futures):
+                future.result()   # surface a failed chunk now
+                done += futures[future]
+                if progress_cb:
+                    progress_cb(done, total)
+            pages = [future.result() for future in futures]
+    else:
+        pages = [request(chunk) for chunk in chunks]
+        if progress_cb:
+            progress_cb(total, total)
+
+    # An article tagged with symbols from two chunks comes back in both; only
+    # file it under the symbols its own request asked for
+    for chunk, articles in zip(chunks, pages):
+        asked = set(chunk)
+        for a in articles:
+            for sym in a.symbols:
+                if sym in asked and len(buckets[sym]) < per_symbol:
+                    buckets[sym].append(a)
+    return buckets
 
-def check_news_catalysts(gainers: list, hours: int = 48) -> list:
-    """Check Alpaca news for each symbol. Adds 'news_catalyst' and 'news_headlines' to each entry."""
+
+def check_news_catalysts(gainers: list, hours: int = 48, progress_cb=None) -> list:
+    """Check Alpaca news for each symbol. Adds 'news_catalyst' and 'news_headlines' to each entry.
+    progress_cb(done, total), if given, is called as the news requests finish."""
     from alpaca.data.historical.news import NewsClient
-    from alpaca.data.requests import NewsRequest
 
     et = pytz.timezone("America/New_York")
     now = datetime.now(et)
@@ -145,28 +445,25 @@ def check_news_catalysts(gainers: list, hours: int = 48) -> list:
 
     print(f"  Checking news catalysts (last {hours}h)...")
 
-    for g in gainers:
-        sym = g["symbol"]
-        try:
-            req = NewsRequest(symbols=sym, start=start, limit=10,
-                              include_content=False, exclude_contentless=False)
-            news_set = client.get_news(request_params=req)
-            articles = news_set.data.get("news", [])
-        except Exception as e:
-            print(f"    {sym:>6} -> news lookup failed ({e})")
+    try:
+        by_symbol = _news_by_symbol(client, [g["symbol"] for g in gainers], start, per_symbol=10,
+                                    progress_cb=progress_cb)
+    except Exception as e:
+        print(f"  News lookup failed ({e})")
+        for g in gainers:
             g["news_catalyst"] = None
             g["news_headlines"] = []
-            continue
+        return gainers
+
+    lines = []
+    for g in gainers:
+        sym = g["symbol"]
 
         # Filter out generic roundup headlines
-        real_headlines = []
-        for a in articles:
-            if not _ROUNDUP_RE.search(a.headline):
-                real_headlines.append({
-                    "headline": a.headline,
-                    "source": a.source,
-                    "time": a.created_at.astimezone(et).strftime("%b %d %I:%M %p"),
-                })
+        real_headlines = [{"headline": a.headline,
+                           "source": a.source,
+                           "time": a.created_at.astimezone(et).strftime("%b %d %I:%M %p")}
+                          for a in by_symbol[sym] if not _is_roundup(a.headline)]
 
         has_catalyst = len(real_headlines) > 0
         g["news_catalyst"] = has_catalyst
@@ -174,16 +471,21 @@ def check_news_catalysts(gainers: list, hours: int = 48) -> list:
 
         tag = "CATALYST" if has_catalyst else "NO NEWS"
         top_hl = real_headlines[0]["headline"][:60] if real_headlines else "(no company-specific news)"
-        print(f"    {sym:>6} -> {tag:<9} {top_hl}")
-        time.sleep(0.1)
+        lines.append(f"    {sym:>6} -> {tag:<9} {top_hl}")
 
+    _write_lines(lines)
     return gainers
 
 
 def filter_no_news(gainers: list) -> list:
     """Remove stocks with no news catalyst."""
-    with_news = [g for g in gainers if g.get("news_catalyst", False)]
-    removed = [g["symbol"] for g in gainers if not g.get("news_catalyst", False)]
+    with_news = []
+    removed = []
+    for g in gainers:
+        if g.get("news_catalyst", False):
+            with_news.append(g)
+        else:
+            removed.append(g["symbol"])
     if removed:
         print(f"  Removed {len(removed)} stocks with no catalyst: {', '.join(removed)}")
     return with_news
@@ -206,20 +508,7 @@ def print_news_detail(gainers: list):
 def filter_gainers(gainers, min_change=20.0, max_price=22.0, min_price=1.0,
                    exclude_warrants=True):
     """Apply filters to the raw screener results."""
-    filtered = []
-    for g in gainers:
-        sym = g["symbol"]
-        price = g["price"]
-        change = g["change_pct"]
-
-        if exclude_warrants and WARRANT_RE.search(sym):
-            continue
-        if change < min_change:
-            continue
-        if price > max_price:
-            continue
-        if price < min_price:
-            continue
-        filtered.append(g)
-
-    return filtered
+    return [g for g in gainers
+            if g["change_pct"] >= min_change
+            and min_price <= g["price"] <= max_price
+            and not (exclude_warrants and is_warrant(g["symbol"]))]
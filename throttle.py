@@ -0,0 +1,24 @@
+"""
+throttle.py — Request pacing shared by the SEC lookups and the bar downloader
+Kept dependency-free so importing it doesn't drag in either caller's stack.
+"""
+
+import threading
+import time
+
+
+class Throttle:
+    """Space request starts at least `interval` seconds apart across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)